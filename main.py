@@ -1,12 +1,16 @@
+import os
+import sys
 from pycparser import c_parser, c_ast
 import networkx as nx
-import matplotlib.pyplot as plt
 from collections import Counter
 
+# A single parser is shared by every parse_c_code call, so the lexer and
+# parser are only built once per process.
+_PARSER = c_parser.CParser()
+
 def parse_c_code(c_code):
     """Parse C code and return the AST"""
-    parser = c_parser.CParser()
-    return parser.parse(c_code)
+    return _PARSER.parse(c_code)
 def generate_pdg(ast):
     """
     Generate a simplified Program Dependence Graph (PDG) from an AST.
@@ -23,6 +27,9 @@ def generate_pdg(ast):
     class PDGVisitor(c_ast.NodeVisitor):
         def __init__(self):
             self.current_node = None
+            # Memoized get_text results keyed by AST node id; the AST is not
+            # mutated while the PDG is built, so each subtree is textified once.
+            self.text_cache = {}
 
         def add_node(self, label, node_type):
             nonlocal node_id 
@@ -127,28 +134,63 @@ def generate_pdg(ast):
                 pdg.add_edge(last_assignment[var_name], use_nid, type="data")
             return
 
-        def get_text(self, node):
+        def text_children(self, node):
+            """Return the sub-expressions whose text makes up node's text."""
+            if isinstance(node, c_ast.BinaryOp):
+                return (node.left, node.right)
+            elif isinstance(node, c_ast.Assignment):
+                return (node.lvalue, node.rvalue)
+            elif isinstance(node, c_ast.UnaryOp):
+                return (node.expr,)
+            elif isinstance(node, c_ast.FuncCall):
+                args_list = []
+                if node.args and hasattr(node.args, 'exprs'):
+                    args_list = node.args.exprs
+                return (node.name, *args_list)
+            return ()
+
+        def join_text(self, node, parts):
+            """Build node's text from the already rendered texts of its children."""
             if isinstance(node, c_ast.Constant):
-                return node.value
+                return sys.intern(node.value)
             elif isinstance(node, c_ast.ID):
-                return node.name
+                return sys.intern(node.name)
             elif isinstance(node, c_ast.BinaryOp):
-                left = self.get_text(node.left)
-                right = self.get_text(node.right)
-                return f"({left} {node.op} {right})"
+                return ''.join(('(', parts[0], ' ', node.op, ' ', parts[1], ')'))
             elif isinstance(node, c_ast.Assignment):
-                return f"{self.get_text(node.lvalue)} {node.op} {self.get_text(node.rvalue)}"
+                return ''.join((parts[0], ' ', node.op, ' ', parts[1]))
             elif isinstance(node, c_ast.UnaryOp):
-                return f"{node.op}{self.get_text(node.expr)}"
+                return node.op + parts[0]
             elif isinstance(node, c_ast.FuncCall):
                 # Return a string representation without creating a new node.
-                func_name = self.get_text(node.name)
-                args_list = []
-                if node.args and hasattr(node.args, 'exprs'):
-                    for arg in node.args.exprs:
-                        args_list.append(self.get_text(arg))
-                return f"Call {func_name}({', '.join(args_list)})"
+                return ''.join(('Call ', parts[0], '(', ', '.join(parts[1:]), ')'))
             return "?"
+
+        def get_text(self, node):
+            # Iterative post-order walk: each node is pushed back with its child
+            # count underneath its children, so once they are done their texts
+            # sit on top of `values` and are joined in one go.
+            stack = [(node, None)]
+            values = []
+            while stack:
+                current, n_children = stack.pop()
+                if n_children is None:
+                    if id(current) in self.text_cache:
+                        values.append(self.text_cache[id(current)])
+                        continue
+                    children = self.text_children(current)
+                    if children:
+                        stack.append((current, len(children)))
+                        for child in reversed(children):
+                            stack.append((child, None))
+                        continue
+                    n_children = 0
+                parts = values[len(values) - n_children:]
+                del values[len(values) - n_children:]
+                text = self.join_text(current, parts)
+                self.text_cache[id(current)] = text
+                values.append(text)
+            return values[0]
         
     visitor = PDGVisitor()
     visitor.visit(ast)
@@ -176,36 +218,26 @@ def weisfeiler_lehman_kernel(G1, G2, h=3):
     G1_label_histograms.append(get_histogram(G1))
     G2_label_histograms.append(get_histogram(G2))
     
-    # Perform h iterations of WL relabeling
-    for i in range(h):
-        # New labels for each graph
-        new_labels_G1 = {}
-        new_labels_G2 = {}
-        
-        # Update labels for G1
-        for node in G1.nodes():
-            current_label = G1.nodes[node]['wl_label']
+    def relabel(G):
+        """Compute the next WL label of every node of G from its neighbors."""
+        new_labels = {}
+        for node in G.nodes():
+            current_label = G.nodes[node]['wl_label']
             neighbor_labels = []
             # Include labels from neighbors along with edge type information
-            for nbr in G1.neighbors(node):
-                nbr_label = G1.nodes[nbr]['wl_label']
-                edge_type = G1.edges[node, nbr].get('type', 'default')
-                neighbor_labels.append(f"{nbr_label}_{edge_type}")
-            neighbor_labels.sort()
-            new_label = f"{current_label}|{'-'.join(neighbor_labels) if neighbor_labels else 'LEAF'}"
-            new_labels_G1[node] = new_label
-        
-        # Update labels for G2
-        for node in G2.nodes():
-            current_label = G2.nodes[node]['wl_label']
-            neighbor_labels = []
-            for nbr in G2.neighbors(node):
-                nbr_label = G2.nodes[nbr]['wl_label']
-                edge_type = G2.edges[node, nbr].get('type', 'default')
+            for nbr in G.neighbors(node):
+                nbr_label = G.nodes[nbr]['wl_label']
+                edge_type = G.edges[node, nbr].get('type', 'default')
                 neighbor_labels.append(f"{nbr_label}_{edge_type}")
             neighbor_labels.sort()
-            new_label = f"{current_label}|{'-'.join(neighbor_labels) if neighbor_labels else 'LEAF'}"
-            new_labels_G2[node] = new_label
+            new_labels[node] = f"{current_label}|{'-'.join(neighbor_labels) if neighbor_labels else 'LEAF'}"
+        return new_labels
+    
+    # Perform h iterations of WL relabeling
+    for i in range(h):
+        # Compute new labels for both graphs before applying either
+        new_labels_G1 = relabel(G1)
+        new_labels_G2 = relabel(G2)
         
         # Apply the new labels and update histograms
         for node, label in new_labels_G1.items():
@@ -228,17 +260,18 @@ def weisfeiler_lehman_kernel(G1, G2, h=3):
     for i in range(h+1):
         hist1 = G1_label_histograms[i]
         hist2 = G2_label_histograms[i]
-        # All labels appearing in either histogram
-        all_labels = set(hist1.keys()) | set(hist2.keys())
-        # Intersection and union counts (using minimum and maximum counts)
-        intersection = sum(min(hist1.get(l, 0), hist2.get(l, 0)) for l in all_labels)
-        union = sum(max(hist1.get(l, 0), hist2.get(l, 0)) for l in all_labels)
+        # Intersection and union counts: Counter's & and | take the
+        # element-wise minimum and maximum
+        intersection = sum((hist1 & hist2).values())
+        union = sum((hist1 | hist2).values())
         if union > 0:
             kernel_value += weights[i] * (intersection / union)
     
     return kernel_value
 def visualize_pdg(pdg, title="Program Dependence Graph"):
     """Visualize a PDG using matplotlib and networkx"""
+    # Imported here so similarity-only runs skip matplotlib's startup cost.
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 8))
     pos = nx.spring_layout(pdg, seed=42)
     node_labels = nx.get_node_attributes(pdg, 'label')
@@ -287,14 +320,15 @@ if __name__ == "__main__":
     pdg1 = generate_pdg(ast1)
     pdg2 = generate_pdg(ast2)
     
-    # Visualize PDGs (optional)
-    plt1 = visualize_pdg(pdg1, "PDG - Code Sample 1")
-    plt1.savefig("pdg1.png")
-    plt1.close()
-    
-    plt2 = visualize_pdg(pdg2, "PDG - Code Sample 2")
-    plt2.savefig("pdg2.png")
-    plt2.close()
+    # Visualize PDGs (optional, set PDG_VIZ)
+    if os.getenv("PDG_VIZ"):
+        plt1 = visualize_pdg(pdg1, "PDG - Code Sample 1")
+        plt1.savefig("pdg1.png")
+        plt1.close()
+        
+        plt2 = visualize_pdg(pdg2, "PDG - Code Sample 2")
+        plt2.savefig("pdg2.png")
+        plt2.close()
     
     # Compute WL kernel similarity between the two PDGs
     similarity = weisfeiler_lehman_kernel(pdg1, pdg2, h=3)
@@ -1,6 +1,77 @@
 # ---------------- parser_utils.py ----------------
+import hashlib
+import importlib.util
+import os
+import pickle
+import tempfile
+from pathlib import Path
+import pycparser
 from pycparser import c_parser
 
+CACHE_DIR = Path(__file__).parent / ".pdg_cache"
+# At most this many ASTs are kept; the oldest written are removed first.
+CACHE_MAX_ENTRIES = 1024
+
+# With PLY-based pycparser (< 3.0) whose prebuilt lexer/parser tables are
+# missing, PLY would rebuild them on every run. In that case they are written
+# once to TABLES_DIR and loaded from there by path on later runs.
+TABLES_DIR = Path(__file__).parent / ".pycparser_cache"
+
+def _table(name):
+    path = TABLES_DIR / f"{name}.py"
+    if not path.exists():
+        return name  # PLY generates the table and writes it to TABLES_DIR
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _make_parser():
+    if (int(pycparser.__version__.split(".")[0]) >= 3
+            or (importlib.util.find_spec("pycparser.lextab") and importlib.util.find_spec("pycparser.yacctab"))):
+        return c_parser.CParser()
+    TABLES_DIR.mkdir(exist_ok=True)
+    return c_parser.CParser(lextab=_table("pdg_lextab"), yacctab=_table("pdg_yacctab"), taboutputdir=str(TABLES_DIR))
+
+_PARSER = _make_parser()
+
 def parse_c_code(c_code):
-    parser = c_parser.CParser()
-    return parser.parse(c_code)
\ No newline at end of file
+    # Parsed ASTs are pickled under CACHE_DIR, keyed by the source text and
+    # the pycparser version that produced them.
+    key = hashlib.sha1(f"{pycparser.__version__}\0{c_code}".encode()).hexdigest()
+    path = CACHE_DIR / f"{key}.pkl"
+    try:
+        return pickle.loads(path.read_bytes())
+    except Exception:  # missing or unreadable entry: treat as a cache miss
+        pass
+    ast = _PARSER.parse(c_code)
+    _store(path, ast)
+    return ast
+
+def _store(path, ast):
+    # Best effort: the cache is only an optimisation, so an AST too deep to
+    # pickle or an unwritable CACHE_DIR just means the entry is not stored.
+    # The entry goes to a temp file that is renamed into place, so a crash
+    # or a concurrent writer can never leave a truncated entry behind.
+    try:
+        data = pickle.dumps(ast)
+    except (RecursionError, pickle.PicklingError):
+        return
+    tmp = None
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False) as tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+        _prune()
+    except OSError:
+        if tmp is not None:
+            Path(tmp.name).unlink(missing_ok=True)
+
+def _prune():
+    entries = list(CACHE_DIR.glob("*.pkl"))
+    if len(entries) <= CACHE_MAX_ENTRIES:
+        return
+    entries.sort(key=lambda p: p.stat().st_mtime)
+    for stale in entries[:len(entries) - CACHE_MAX_ENTRIES]:
+        stale.unlink(missing_ok=True)
@@ -1,101 +1,197 @@
 # ---------------- pdg_generator.py ----------------
-import networkx as nx
+import sys
+from collections import deque
 from pycparser import c_ast
 
+CONTROL, DATA, DEFAULT = 0, 1, 2
+KIND = {'control': CONTROL, 'data': DATA, 'default': DEFAULT}
+KIND_NAMES = tuple(KIND)
+KIND_BITS = max(KIND.values()).bit_length()
+
+# Node type -> small int id; also the initial WL labels. Unknown types are
+# appended on first use, so ids are consistent across all PDGs in a process.
+TYPE_TO_ID = {t: i for i, t in enumerate(('decl', 'assign', 'func_call', 'if', 'return', 'use'))}
+
+class PDG:
+    """Struct-of-arrays PDG: node i is labels[i]/types[i] (type id in
+    type_ids[i]), with out-edges out_adj[i] and their kinds (KIND values)
+    in edge_kind[i]."""
+    __slots__ = ('labels', 'types', 'type_ids', 'out_adj', 'edge_kind')
+
+    def __init__(self):
+        self.labels = []
+        self.types = []
+        self.type_ids = []
+        self.out_adj = []
+        self.edge_kind = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add_node(self, label, node_type):
+        self.labels.append(label)
+        self.types.append(node_type)
+        self.type_ids.append(TYPE_TO_ID.setdefault(node_type, len(TYPE_TO_ID)))
+        self.out_adj.append([])
+        self.edge_kind.append([])
+        return len(self.labels) - 1
+
+    def add_edge(self, u, v, kind):
+        # kind is one of the KIND ints. As with a DiGraph, re-adding an
+        # existing edge only updates its kind.
+        nbrs = self.out_adj[u]
+        if v in nbrs:
+            self.edge_kind[u][nbrs.index(v)] = kind
+        else:
+            nbrs.append(v)
+            self.edge_kind[u].append(kind)
+
+class _BranchEnd:
+    """Worklist marker popped after an if-branch has been fully walked."""
+
+_BRANCH_END = _BranchEnd()
+
+def _text_children(node):
+    if isinstance(node, c_ast.BinaryOp): return (node.left, node.right)
+    elif isinstance(node, c_ast.Assignment): return (node.lvalue, node.rvalue)
+    elif isinstance(node, c_ast.UnaryOp): return (node.expr,)
+    elif isinstance(node, c_ast.FuncCall):
+        args = node.args.exprs if node.args and hasattr(node.args, 'exprs') else []
+        return (node.name, *args)
+    return ()
+
+def _join_text(node, parts):
+    if isinstance(node, c_ast.Constant): return sys.intern(node.value)
+    elif isinstance(node, c_ast.ID): return sys.intern(node.name)
+    elif isinstance(node, c_ast.BinaryOp): return ''.join(('(', parts[0], ' ', node.op, ' ', parts[1], ')'))
+    elif isinstance(node, c_ast.Assignment): return ''.join((parts[0], ' ', node.op, ' ', parts[1]))
+    elif isinstance(node, c_ast.UnaryOp): return node.op + parts[0]
+    elif isinstance(node, c_ast.FuncCall): return ''.join(('Call ', parts[0], '(', ', '.join(parts[1:]), ')'))
+    return "?"
+
 class PDGGenerator:
     def __init__(self):
-        self.pdg = nx.DiGraph()
-        self.node_id = 0
+        self.pdg = PDG()
         self.last_assignment = {}
+        self.current_node = None
+        self._text_cache = {}
+        self.dispatch = {
+            c_ast.Decl: self._decl,
+            c_ast.Assignment: self._assign,
+            c_ast.FuncCall: self._func_call,
+            c_ast.If: self._if,
+            c_ast.Return: self._return,
+            c_ast.Compound: self._compound,
+            c_ast.ID: self._id,
+            _BranchEnd: self._branch_end,
+        }
 
     def generate(self, ast):
-        class Visitor(c_ast.NodeVisitor):
-            def __init__(self, outer):
-                self.outer = outer
-                self.current_node = None
-
-            def add_node(self, label, node_type):
-                nid = f"n{self.outer.node_id}"
-                self.outer.pdg.add_node(nid, label=label, type=node_type)
-                if self.current_node is not None:
-                    self.outer.pdg.add_edge(self.current_node, nid, type="control")
-                self.current_node = nid
-                self.outer.node_id += 1
-                return nid
-
-            def visit_Decl(self, node):
-                decl_id = self.add_node(f"Decl {node.name}", "decl")
-                if node.init:
-                    if isinstance(node.init, c_ast.FuncCall):
-                        call_id = self.visit_FuncCall(node.init)
-                        assign_id = self.add_node(f"{node.name} = [call]", "assign")
-                        self.outer.pdg.add_edge(assign_id, call_id, type="data")
-                    else:
-                        init_str = self.get_text(node.init)
-                        assign_id = self.add_node(f"{node.name} = {init_str}", "assign")
-
-            def visit_Assignment(self, node):
-                lval = self.get_text(node.lvalue)
-                if isinstance(node.rvalue, c_ast.FuncCall):
-                    call_id = self.visit_FuncCall(node.rvalue)
-                    nid = self.add_node(f"{lval} {node.op} [call]", "assign")
-                    self.outer.pdg.add_edge(nid, call_id, type="data")
-                else:
-                    rval = self.get_text(node.rvalue)
-                    nid = self.add_node(f"{lval} {node.op} {rval}", "assign")
-                self.outer.last_assignment[lval] = nid
-                self.generic_visit(node.rvalue)
-
-            def visit_FuncCall(self, node):
-                func_name = self.get_text(node.name)
-                args = []
-                if node.args and hasattr(node.args, 'exprs'):
-                    args = [self.get_text(arg) for arg in node.args.exprs]
-                return self.add_node(f"Call {func_name}({', '.join(args)})", "func_call")
-
-            def visit_If(self, node):
-                cond = self.get_text(node.cond)
-                cond_nid = self.add_node(f"If {cond}?", "if")
-                if node.iftrue:
-                    old = self.current_node
-                    self.current_node = cond_nid
-                    self.visit(node.iftrue)
-                    self.outer.pdg.add_edge(cond_nid, self.current_node, type="control")
-                    self.current_node = old
-                if node.iffalse:
-                    old = self.current_node
-                    self.current_node = cond_nid
-                    self.visit(node.iffalse)
-                    self.outer.pdg.add_edge(cond_nid, self.current_node, type="control")
-                    self.current_node = old
-
-            def visit_Return(self, node):
-                label = f"Return {self.get_text(node.expr)}" if node.expr else "Return"
-                self.add_node(label, "return")
-                if node.expr:
-                    self.generic_visit(node.expr)
-
-            def visit_Compound(self, node):
-                for stmt in (node.block_items or []):
-                    self.visit(stmt)
-
-            def visit_ID(self, node):
-                name = node.name
-                if name in self.outer.last_assignment:
-                    use_nid = self.add_node(f"Use {name}", "use")
-                    self.outer.pdg.add_edge(self.outer.last_assignment[name], use_nid, type="data")
-
-            def get_text(self, node):
-                if isinstance(node, c_ast.Constant): return node.value
-                elif isinstance(node, c_ast.ID): return node.name
-                elif isinstance(node, c_ast.BinaryOp): return f"({self.get_text(node.left)} {node.op} {self.get_text(node.right)})"
-                elif isinstance(node, c_ast.Assignment): return f"{self.get_text(node.lvalue)} {node.op} {self.get_text(node.rvalue)}"
-                elif isinstance(node, c_ast.UnaryOp): return f"{node.op}{self.get_text(node.expr)}"
-                elif isinstance(node, c_ast.FuncCall):
-                    args = [self.get_text(arg) for arg in node.args.exprs] if node.args and hasattr(node.args, 'exprs') else []
-                    return f"Call {self.get_text(node.name)}({', '.join(args)})"
-                return "?"
-
-        visitor = Visitor(self)
-        visitor.visit(ast)
-        return self.pdg
\ No newline at end of file
+        # Explicit worklist instead of NodeVisitor recursion; handlers push
+        # children in reverse so they are popped in source order. Each AST
+        # starts a fresh control chain, as a new visitor per call used to.
+        # The text cache is keyed by node id, which is only stable while
+        # this AST is alive, so it is dropped as well.
+        self.current_node = None
+        self._text_cache = {}
+        stack = deque([(ast, None)])
+        dispatch, generic = self.dispatch, self._generic
+        while stack:
+            node, ctx = stack.pop()
+            dispatch.get(type(node), generic)(node, ctx, stack)
+        return self.pdg
+
+    def add_node(self, label, node_type):
+        nid = self.pdg.add_node(label, node_type)
+        if self.current_node is not None:
+            self.pdg.add_edge(self.current_node, nid, CONTROL)
+        self.current_node = nid
+        return nid
+
+    def _push_children(self, node, stack):
+        stack.extend((child, None) for _, child in reversed(node.children()))
+
+    def _generic(self, node, ctx, stack):
+        self._push_children(node, stack)
+
+    def _decl(self, node, ctx, stack):
+        decl_id = self.add_node(f"Decl {node.name}", "decl")
+        if node.init:
+            if isinstance(node.init, c_ast.FuncCall):
+                call_id = self._func_call(node.init, ctx, stack)
+                assign_id = self.add_node(f"{node.name} = [call]", "assign")
+                self.pdg.add_edge(assign_id, call_id, DATA)
+            else:
+                init_str = self.get_text(node.init)
+                assign_id = self.add_node(f"{node.name} = {init_str}", "assign")
+
+    def _assign(self, node, ctx, stack):
+        lval = self.get_text(node.lvalue)
+        if isinstance(node.rvalue, c_ast.FuncCall):
+            call_id = self._func_call(node.rvalue, ctx, stack)
+            nid = self.add_node(f"{lval} {node.op} [call]", "assign")
+            self.pdg.add_edge(nid, call_id, DATA)
+        else:
+            rval = self.get_text(node.rvalue)
+            nid = self.add_node(f"{lval} {node.op} {rval}", "assign")
+        self.last_assignment[lval] = nid
+        self._push_children(node.rvalue, stack)
+
+    def _func_call(self, node, ctx, stack):
+        func_name = self.get_text(node.name)
+        args = []
+        if node.args and hasattr(node.args, 'exprs'):
+            args = [self.get_text(arg) for arg in node.args.exprs]
+        return self.add_node(f"Call {func_name}({', '.join(args)})", "func_call")
+
+    def _if(self, node, ctx, stack):
+        cond = self.get_text(node.cond)
+        cond_nid = self.add_node(f"If {cond}?", "if")
+        for branch in (node.iffalse, node.iftrue):
+            if branch:
+                stack.append((_BRANCH_END, cond_nid))
+                stack.append((branch, None))
+
+    def _branch_end(self, node, cond_nid, stack):
+        self.pdg.add_edge(cond_nid, self.current_node, CONTROL)
+        self.current_node = cond_nid
+
+    def _return(self, node, ctx, stack):
+        label = f"Return {self.get_text(node.expr)}" if node.expr else "Return"
+        self.add_node(label, "return")
+        if node.expr:
+            self._push_children(node.expr, stack)
+
+    def _compound(self, node, ctx, stack):
+        stack.extend((stmt, None) for stmt in reversed(node.block_items or []))
+
+    def _id(self, node, ctx, stack):
+        name = node.name
+        if name in self.last_assignment:
+            use_nid = self.add_node(f"Use {name}", "use")
+            self.pdg.add_edge(self.last_assignment[name], use_nid, DATA)
+
+    def get_text(self, node):
+        # Iterative post-order walk: a node is pushed back with its child count
+        # under its children, then joins their texts off the top of `values`.
+        # Results are memoized per AST node id for the current generate() call;
+        # ASTs are not mutated after parsing.
+        cache = self._text_cache
+        stack, values = [(node, None)], []
+        while stack:
+            cur, n = stack.pop()
+            if n is None:
+                if id(cur) in cache:
+                    values.append(cache[id(cur)])
+                    continue
+                children = _text_children(cur)
+                if children:
+                    stack.append((cur, len(children)))
+                    stack.extend((child, None) for child in reversed(children))
+                    continue
+                n = 0
+            parts = values[len(values) - n:]
+            del values[len(values) - n:]
+            text = cache[id(cur)] = _join_text(cur, parts)
+            values.append(text)
+        return values[0]
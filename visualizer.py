@@ -1,14 +1,35 @@
 # ---------------- visualizer.py ----------------
-import matplotlib.pyplot as plt
 import networkx as nx
+from pdg_generator import KIND_NAMES
+
+def to_networkx(pdg):
+    g = nx.DiGraph()
+    for n, (label, node_type) in enumerate(zip(pdg.labels, pdg.types)):
+        g.add_node(n, label=label, type=node_type)
+    for u, (nbrs, kinds) in enumerate(zip(pdg.out_adj, pdg.edge_kind)):
+        g.add_edges_from((u, v, {'type': KIND_NAMES[k]}) for v, k in zip(nbrs, kinds))
+    return g
+
+def _layout(g):
+    # Kamada-Kawai (needs scipy) for small graphs and Graphviz dot (needs
+    # pygraphviz) for larger ones; spring layout if either is unavailable.
+    try:
+        if len(g) <= 50:
+            return nx.kamada_kawai_layout(g)
+        return nx.nx_agraph.graphviz_layout(g, prog="dot")
+    except ImportError:
+        return nx.spring_layout(g, seed=42)
 
 def visualize_pdg(pdg, title="PDG"):
+    # matplotlib is imported on first use so similarity-only runs never load it.
+    import matplotlib.pyplot as plt
+    g = to_networkx(pdg)
     plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(pdg, seed=42)
-    node_labels = nx.get_node_attributes(pdg, 'label')
-    edge_labels = nx.get_edge_attributes(pdg, 'type')
-    nx.draw(pdg, pos, with_labels=True, labels=node_labels, node_color='lightblue', node_size=2500, arrows=True)
-    nx.draw_networkx_edge_labels(pdg, pos, edge_labels=edge_labels)
+    pos = _layout(g)
+    node_labels = nx.get_node_attributes(g, 'label')
+    edge_labels = nx.get_edge_attributes(g, 'type')
+    nx.draw(g, pos, with_labels=True, labels=node_labels, node_color='lightblue', node_size=2500, arrows=True)
+    nx.draw_networkx_edge_labels(g, pos, edge_labels=edge_labels)
     plt.title(title)
     plt.axis('off')
     return plt
\ No newline at end of file
@@ -0,0 +1,88 @@
+# ---------------- wl_numba.py ----------------
+# numba-compiled WL relabel step. wl_kernel imports this lazily and only for
+# large batches, where it outweighs numba's import and JIT start-up cost.
+from itertools import chain
+import numpy as np
+from numba import njit
+from pdg_generator import KIND_BITS
+
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+
+@njit(cache=True)
+def _fnv1a(h, value):
+    v = np.uint64(value)
+    for _ in range(8):
+        h = (h ^ (v & np.uint64(0xff))) * FNV_PRIME
+        v = v >> np.uint64(8)
+    return h
+
+# The CSR arrays hold node i's out-edges in nbrs/etypes[indptr[i]:indptr[i + 1]].
+# Neighbor keys are packed into a caller-owned scratch buffer sized for the
+# largest degree, so no array is allocated per node.
+@njit(cache=True)
+def _sorted_keys(indptr, nbrs, etypes, labels, i, buf):
+    start, end = indptr[i], indptr[i + 1]
+    for k in range(start, end):
+        buf[k - start] = (labels[nbrs[k]] << KIND_BITS) | etypes[k]
+    keys = buf[:end - start]
+    keys.sort()
+    return keys
+
+@njit(cache=True)
+def _wl_hash(indptr, nbrs, etypes, labels, out):
+    buf = np.empty(np.max(np.diff(indptr)) if labels.shape[0] else 0, dtype=np.int64)
+    for i in range(labels.shape[0]):
+        h = _fnv1a(FNV_OFFSET, labels[i])
+        for key in _sorted_keys(indptr, nbrs, etypes, labels, i, buf):
+            h = _fnv1a(h, key)
+        out[i] = h
+
+# True if every node has the same (label, sorted neighbor keys) signature as
+# the first node sharing its hash, i.e. no two signatures collided.
+@njit(cache=True)
+def _no_collisions(indptr, nbrs, etypes, labels, ids, first):
+    max_degree = np.max(np.diff(indptr)) if labels.shape[0] else 0
+    buf1 = np.empty(max_degree, dtype=np.int64)
+    buf2 = np.empty(max_degree, dtype=np.int64)
+    for i in range(labels.shape[0]):
+        r = first[ids[i]]
+        if r == i:
+            continue
+        if labels[i] != labels[r] or indptr[i + 1] - indptr[i] != indptr[r + 1] - indptr[r]:
+            return False
+        a = _sorted_keys(indptr, nbrs, etypes, labels, i, buf1)
+        b = _sorted_keys(indptr, nbrs, etypes, labels, r, buf2)
+        for k in range(a.shape[0]):
+            if a[k] != b[k]:
+                return False
+    return True
+
+def flatten(pdgs):
+    sizes = [len(pdg) for pdg in pdgs]
+    out_adj = [nbrs for pdg in pdgs for nbrs in pdg.out_adj]
+    labels = np.fromiter(chain.from_iterable(pdg.type_ids for pdg in pdgs), np.int64, sum(sizes))
+    degrees = np.fromiter(map(len, out_adj), np.int64, len(out_adj))
+    indptr = np.zeros(len(out_adj) + 1, dtype=np.int64)
+    indptr[1:] = degrees.cumsum()
+    nbrs = np.fromiter(chain.from_iterable(out_adj), np.int64, indptr[-1])
+    nbrs += np.repeat(np.repeat(np.cumsum([0] + sizes[:-1]), sizes), degrees)
+    etypes = np.fromiter(chain.from_iterable(kinds for pdg in pdgs for kinds in pdg.edge_kind), np.int64, indptr[-1])
+    return labels, (indptr, nbrs, etypes)
+
+# np.unique turns the hashes back into dense ids, as the dict-based
+# compression does. If two different signatures ever share a hash, the
+# iteration is redone exactly with a dict so results never depend on hashing.
+def relabel(labels, csr):
+    out = np.empty(len(labels), dtype=np.uint64)
+    _wl_hash(*csr, labels, out)
+    uniq, first, ids = np.unique(out, return_index=True, return_inverse=True)
+    if _no_collisions(*csr, labels, ids, first):
+        return ids, len(uniq)
+    indptr, nbrs, etypes = (a.tolist() for a in csr)
+    labels = labels.tolist()
+    compress = {}
+    ids = [compress.setdefault((labels[i], tuple(sorted(labels[nbrs[k]] << KIND_BITS | etypes[k]
+                                                        for k in range(indptr[i], indptr[i + 1])))), len(compress))
+           for i in range(len(labels))]
+    return np.array(ids, dtype=np.int64), len(compress)